@@ -2,7 +2,7 @@ import uuid
 from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy import func, or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.models.category import Category
 from app.models.inventory import Inventory
@@ -83,6 +83,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
                 joinedload(Product.images),
                 joinedload(Product.inventory),
                 joinedload(Product.reviews),
+                selectinload(Product.variants).joinedload(ProductVariant.inventory),
             )
             .offset(skip)
             .limit(limit)
@@ -173,6 +174,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
             joinedload(Product.images),
             joinedload(Product.inventory),
             joinedload(Product.reviews),
+            selectinload(Product.variants).joinedload(ProductVariant.inventory),
         ).offset(skip).limit(limit).all()
 
         return products, total
@@ -234,6 +236,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
             joinedload(Product.images),
             joinedload(Product.inventory),
             joinedload(Product.reviews),
+            selectinload(Product.variants).joinedload(ProductVariant.inventory),
         ).offset(skip).limit(limit).all()
 
         return products, total
@@ -292,6 +295,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
             joinedload(Product.images),
             joinedload(Product.inventory),
             joinedload(Product.reviews),
+            selectinload(Product.variants).joinedload(ProductVariant.inventory),
         ).offset(skip).limit(limit).all()
 
         return products, total
@@ -311,6 +315,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
                 joinedload(Product.images),
                 joinedload(Product.inventory),
                 joinedload(Product.reviews),
+                selectinload(Product.variants).joinedload(ProductVariant.inventory),
             )
             .limit(limit)
             .all()
@@ -347,6 +352,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
                 joinedload(Product.images),
                 joinedload(Product.inventory),
                 joinedload(Product.reviews),
+                selectinload(Product.variants).joinedload(ProductVariant.inventory),
             )
             .order_by(Product.created_at.desc())
             .limit(limit)
@@ -412,6 +418,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
                 joinedload(Product.images),
                 joinedload(Product.inventory),
                 joinedload(Product.reviews),
+                selectinload(Product.variants).joinedload(ProductVariant.inventory),
             )
             .all()
         )
@@ -434,6 +441,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
                     joinedload(Product.images),
                     joinedload(Product.inventory),
                     joinedload(Product.reviews),
+                    selectinload(Product.variants).joinedload(ProductVariant.inventory),
                 )
                 .limit(featured_count)
                 .all()
@@ -574,6 +582,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
                     joinedload(Product.images),
                     joinedload(Product.inventory),
                     joinedload(Product.reviews),
+                    selectinload(Product.variants).joinedload(ProductVariant.inventory),
                 )
                 .limit(limit)
                 .all()
@@ -598,6 +607,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
                     joinedload(Product.images),
                     joinedload(Product.inventory),
                     joinedload(Product.reviews),
+                    selectinload(Product.variants).joinedload(ProductVariant.inventory),
                 )
                 .limit(remaining)
                 .all()
@@ -631,6 +641,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
                     joinedload(Product.images),
                     joinedload(Product.inventory),
                     joinedload(Product.reviews),
+                    selectinload(Product.variants).joinedload(ProductVariant.inventory),
                 )
                 .limit(remaining)
                 .all()
@@ -655,6 +666,7 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
                     joinedload(Product.images),
                     joinedload(Product.inventory),
                     joinedload(Product.reviews),
+                    selectinload(Product.variants).joinedload(ProductVariant.inventory),
                 )
                 .limit(remaining)
                 .all()
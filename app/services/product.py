@@ -347,7 +347,7 @@ class ProductService:
             Tuple of (products list, total count)
         """
         from sqlalchemy import or_
-        from sqlalchemy.orm import joinedload
+        from sqlalchemy.orm import joinedload, selectinload
         
         search_term = f"%{query}%"
         
@@ -376,6 +376,7 @@ class ProductService:
                 joinedload(Product.images),
                 joinedload(Product.inventory),
                 joinedload(Product.reviews),
+                selectinload(Product.variants).joinedload(ProductVariant.inventory),
             )
             .limit(limit)
             .all()
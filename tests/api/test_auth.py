@@ -31,7 +31,7 @@ class TestUserRegistration:
         assert "id" in data
         assert "password_hash" not in data  # Ensure password is not returned
 
-    def test_register_user_email_exists(self, client, db):
+    def test_register_user_email_exists(self, client):
         """
         GIVEN an email that is already registered
         WHEN a user tries to register with that email
@@ -118,21 +118,18 @@ class TestUserRegistration:
 class TestUserAuthentication:
     """Tests for user authentication functionality."""
     
-    def test_login_success(self, client, db):
+    def test_login_success(self, client, user_factory):
         """
         GIVEN a registered user with valid credentials
         WHEN the user logs in with those credentials
         THEN the user should receive valid authentication tokens
         """
-        # First register a user
+        # First create a user
         user_data = {
             "email": "login-success@example.com",
             "password": "StrongPass123!",
-            "confirm_password": "StrongPass123!",
-            "first_name": "Login",
-            "last_name": "Success"
         }
-        client.post("/api/v1/auth/register", json=user_data)
+        user_factory(user_data["email"], user_data["password"], first_name="Login", last_name="Success")
         
         # Login with correct credentials
         login_data = {
@@ -150,21 +147,18 @@ class TestUserAuthentication:
         assert "refresh_token" in data
         assert data["token_type"] == "bearer"
 
-    def test_login_invalid_credentials(self, client, db):
+    def test_login_invalid_credentials(self, client, user_factory):
         """
         GIVEN a registered user
         WHEN the user logs in with incorrect password
         THEN an authentication error should be returned
         """
-        # First register a user
+        # First create a user
         user_data = {
             "email": "login-fail@example.com",
             "password": "StrongPass123!",
-            "confirm_password": "StrongPass123!",
-            "first_name": "Login",
-            "last_name": "Fail"
         }
-        client.post("/api/v1/auth/register", json=user_data)
+        user_factory(user_data["email"], user_data["password"], first_name="Login", last_name="Fail")
         
         # Login with wrong password
         login_data = {
@@ -201,21 +195,18 @@ class TestUserAuthentication:
 class TestTokenManagement:
     """Tests for token management functionality."""
     
-    def test_refresh_token_success(self, client):
+    def test_refresh_token_success(self, client, user_factory):
         """
         GIVEN a valid refresh token
         WHEN the user requests a new access token
         THEN a new access token should be issued
         """
-        # First register a user
+        # First create a user
         user_data = {
             "email": "refresh-test@example.com",
             "password": "StrongPass123!",
-            "confirm_password": "StrongPass123!",
-            "first_name": "Refresh",
-            "last_name": "Test"
         }
-        client.post("/api/v1/auth/register", json=user_data)
+        user_factory(user_data["email"], user_data["password"], first_name="Refresh", last_name="Test")
         
         # Login to get a refresh token
         login_data = {
@@ -171,7 +171,7 @@ class TestInventoryAdministration:
 class TestInventoryRetrieval:
     """Tests for inventory retrieval operations."""
     
-    def test_get_product_inventory(self, client, superuser_token_headers, db):
+    def test_get_product_inventory(self, client, db):
         """
         GIVEN a product with inventory in the database
         WHEN a request is made to get that product's inventory
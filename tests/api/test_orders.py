@@ -284,7 +284,7 @@ class TestOrderRetrieval:
         assert data["items"][0]["total_amount"] == "120.00"
         
         
-    def test_get_orders_pagination(self, client, db, normal_user_token_headers):
+    def test_get_orders_pagination(self, client, normal_user_token_headers):
         """
         GIVEN an authenticated user with multiple orders
         WHEN the user requests orders with pagination
@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from app.utils.datetime_utils import utcnow
+from tests.utils import parse_json
 
 
 class TestProductBasics:
@@ -16,7 +17,7 @@ class TestProductBasics:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify pagination structure
         assert "items" in data
@@ -51,7 +52,7 @@ class TestProductBasics:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify product data
         assert data["name"] == product.name
@@ -84,7 +85,7 @@ class TestProductBasics:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify product data
         assert data["name"] == product.name
@@ -144,7 +145,7 @@ class TestProductAdministration:
         
         # Verify response
         assert response.status_code == 201
-        data = response.json()
+        data = parse_json(response)
         
         # Verify product data
         assert data["name"] == product_data["name"]
@@ -187,7 +188,7 @@ class TestProductAdministration:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify updated data
         assert data["name"] == update_data["name"]
@@ -285,7 +286,7 @@ class TestProductSearch:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify search results
         assert len(data["items"]) == 1
@@ -296,7 +297,7 @@ class TestProductSearch:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify search results
         assert len(data["items"]) == 3
@@ -310,7 +311,7 @@ class TestProductSearch:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify search results
         assert len(data["items"]) == 1
@@ -365,7 +366,7 @@ class TestProductCollections:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify featured products
         assert len(data) == 2
@@ -419,7 +420,7 @@ class TestProductCollections:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify new arrivals order
         assert len(data) >= 2
@@ -538,7 +539,7 @@ class TestProductCollections:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify bestsellers
         assert len(data) >= 2
@@ -702,7 +703,7 @@ class TestProductRelationships:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify related products
         assert len(data) >= 2
@@ -784,7 +785,7 @@ class TestProductRelationships:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify pagination structure
         assert "items" in data
@@ -860,7 +861,7 @@ class TestProductRelationships:
         
         # Verify response
         assert response.status_code == 200
-        data = response.json()
+        data = parse_json(response)
         
         # Verify pagination structure
         assert "items" in data
@@ -1,5 +1,37 @@
 import pytest
 
+from app.models.address import Address, AddressType
+from tests.utils import sequential_uuid
+
+ADDRESSES_URL = "/api/v1/users/me/addresses"
+ADDRESS_URL = ADDRESSES_URL + "/{address_id}"
+
+BASE_ADDRESS_DATA = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "street_address_1": "123 Main St",
+    "city": "New York",
+    "postal_code": "10001",
+    "country": "USA",
+    "address_type": "shipping",
+    "is_default": True,
+}
+
+
+@pytest.fixture
+def address(db, normal_user_id):
+    """
+    Insert a default address for the normal user.
+    """
+    address = Address(
+        id=sequential_uuid(),
+        user_id=normal_user_id,
+        **(BASE_ADDRESS_DATA | {"address_type": AddressType.BILLING}),
+    )
+    db.add(address)
+    db.flush()
+    return address
+
 
 class TestUserManagement:
     """Tests for user management functionality."""
@@ -30,7 +62,7 @@ class TestUserManagement:
         assert "id" in data
         assert "password_hash" not in data  # Ensure password is not returned
 
-    def test_login_user(self, client, db):
+    def test_login_user(self, client, user_factory):
         """
         GIVEN a registered user
         WHEN the user logs in with valid credentials
@@ -40,11 +72,8 @@ class TestUserManagement:
         user_data = {
             "email": "test-login@example.com",
             "password": "Password123",
-            "confirm_password": "Password123",
-            "first_name": "Login",
-            "last_name": "Test"
         }
-        client.post("/api/v1/auth/register", json=user_data)
+        user_factory(user_data["email"], user_data["password"])
 
         # Then login
         login_data = {
@@ -117,18 +146,9 @@ class TestUserAddresses:
         WHEN the user creates a new address
         THEN the address should be created successfully
         """
-        address_data = {
-            "first_name": "John",
-            "last_name": "Doe",
-            "street_address_1": "123 Main St",
-            "city": "New York",
-            "postal_code": "10001",
-            "country": "USA",
-            "address_type": "shipping",
-            "is_default": True
-        }
+        address_data = BASE_ADDRESS_DATA
         response = client.post(
-            "/api/v1/users/me/addresses",
+            ADDRESSES_URL,
             json=address_data,
             headers=normal_user_token_headers
         )
@@ -148,32 +168,15 @@ class TestUserAddresses:
         assert data["is_default"] == address_data["is_default"]
         assert "id" in data
 
-    def test_get_addresses(self, client, normal_user_token_headers):
+    def test_get_addresses(self, client, normal_user_token_headers, address):
         """
         GIVEN an authenticated user with addresses
         WHEN the user requests their addresses
         THEN the user's addresses should be returned
         """
-        # First create an address
-        address_data = {
-            "first_name": "Jane",
-            "last_name": "Doe",
-            "street_address_1": "456 Broadway",
-            "city": "Chicago",
-            "postal_code": "60601",
-            "country": "USA",
-            "address_type": "billing",
-            "is_default": True
-        }
-        client.post(
-            "/api/v1/users/me/addresses",
-            json=address_data,
-            headers=normal_user_token_headers
-        )
-
         # Get all addresses
         response = client.get(
-            "/api/v1/users/me/addresses", 
+            ADDRESSES_URL, 
             headers=normal_user_token_headers
         )
         
@@ -183,48 +186,57 @@ class TestUserAddresses:
         
         # Verify addresses data
         assert isinstance(data, list)
-        assert len(data) >= 1
-        
-        # Find the address we just created
-        created_address = next(
-            (addr for addr in data if addr["street_address_1"] == address_data["street_address_1"]), 
-            None
-        )
-        assert created_address is not None
-        assert created_address["city"] == address_data["city"]
-        assert created_address["address_type"] == address_data["address_type"]
+        assert [addr["id"] for addr in data] == [str(address.id)]
 
-    def test_update_address(self, client, normal_user_token_headers):
+    def test_get_address(self, client, normal_user_token_headers, address):
         """
         GIVEN an authenticated user with an address
-        WHEN the user updates the address
-        THEN the address should be updated successfully
+        WHEN the user requests that address by its ID
+        THEN the address should be returned
         """
-        # First create an address
-        address_data = {
-            "first_name": "Update",
-            "last_name": "Test",
-            "street_address_1": "789 Oak St",
-            "city": "Seattle",
-            "postal_code": "98101",
-            "country": "USA",
-            "address_type": "shipping",
-            "is_default": True
-        }
-        create_response = client.post(
-            "/api/v1/users/me/addresses",
-            json=address_data,
+        response = client.get(
+            ADDRESS_URL.format(address_id=address.id),
             headers=normal_user_token_headers
         )
-        address_id = create_response.json()["id"]
+        
+        # Verify response
+        assert response.status_code == 200
+        data = response.json()
+        
+        # Verify address data
+        assert data["id"] == str(address.id)
+        expected = BASE_ADDRESS_DATA | {"address_type": address.address_type.value}
+        for field, value in expected.items():
+            assert data[field] == value
 
-        # Update the address
-        update_data = {
-            "city": "Portland",
-            "postal_code": "97201"
+    @pytest.mark.parametrize(
+        "update_data",
+        [
+            {"city": "Portland", "postal_code": "97201"},
+            {"street_address_1": "789 Oak Ave"},
+            {"first_name": "Janet"},
+            {"address_type": "shipping"},
+        ],
+        ids=["location", "street", "name", "address_type"],
+    )
+    def test_update_address(self, client, normal_user_token_headers, address, update_data):
+        """
+        GIVEN an authenticated user with an address
+        WHEN the user updates some of the address's fields
+        THEN those fields should be updated and the rest left unchanged
+        """
+        original = {
+            "first_name": address.first_name,
+            "last_name": address.last_name,
+            "street_address_1": address.street_address_1,
+            "city": address.city,
+            "postal_code": address.postal_code,
+            "address_type": address.address_type.value,
         }
+
+        # Update the address
         response = client.put(
-            f"/api/v1/users/me/addresses/{address_id}",
+            ADDRESS_URL.format(address_id=address.id),
             json=update_data,
             headers=normal_user_token_headers
         )
@@ -234,40 +246,21 @@ class TestUserAddresses:
         data = response.json()
         
         # Verify updated data
-        assert data["city"] == update_data["city"]
-        assert data["postal_code"] == update_data["postal_code"]
-        assert data["street_address_1"] == address_data["street_address_1"]
-        assert data["first_name"] == address_data["first_name"]
-        assert data["last_name"] == address_data["last_name"]
-        assert "id" in data
+        for field, value in {**original, **update_data}.items():
+            assert data[field] == value
+        assert data["id"] == str(address.id)
 
-    def test_delete_address(self, client, normal_user_token_headers):
+    def test_delete_address(self, client, normal_user_token_headers, address):
         """
         GIVEN an authenticated user with an address
         WHEN the user deletes the address
         THEN the address should be deleted successfully
         """
-        # First create an address
-        address_data = {
-            "first_name": "Delete",
-            "last_name": "Test",
-            "street_address_1": "321 Pine St",
-            "city": "Miami",
-            "postal_code": "33101",
-            "country": "USA",
-            "address_type": "billing",
-            "is_default": True
-        }
-        create_response = client.post(
-            "/api/v1/users/me/addresses",
-            json=address_data,
-            headers=normal_user_token_headers
-        )
-        address_id = create_response.json()["id"]
+        address_id = address.id
 
         # Delete the address
         response = client.delete(
-            f"/api/v1/users/me/addresses/{address_id}",
+            ADDRESS_URL.format(address_id=address_id),
             headers=normal_user_token_headers
         )
         
@@ -276,7 +269,7 @@ class TestUserAddresses:
         
         # Verify it's deleted
         get_response = client.get(
-            f"/api/v1/users/me/addresses/{address_id}",
+            ADDRESS_URL.format(address_id=address_id),
             headers=normal_user_token_headers
         )
         assert get_response.status_code == 404
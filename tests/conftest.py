@@ -1,13 +1,18 @@
+import hashlib
 import os
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import Enum, create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
 
+from app.core.security import pwd_context
 from app.db.base import Base
-from app.db.session import get_db
-from app.main import app
+
+# Hash test passwords with bcrypt's minimum work factor; the production
+# cost makes every registration and login in the suite take ~0.25s
+pwd_context.update(bcrypt__rounds=4)
 
 # Use environment variables for test database configuration
 TEST_POSTGRES_SERVER = os.getenv("TEST_POSTGRES_SERVER", "test_db")
@@ -20,9 +25,20 @@ TEST_SQLALCHEMY_DATABASE_URL = (
     f"postgresql://{TEST_POSTGRES_USER}:{TEST_POSTGRES_PASSWORD}@{TEST_POSTGRES_SERVER}/{TEST_POSTGRES_DB}"
 )
 
+# Under pytest-xdist every worker gets its own schema so parallel workers
+# never share tables
+TEST_SCHEMA = os.getenv("PYTEST_XDIST_WORKER")
+
+# Test data is thrown away after every run, so commits don't need to wait
+# for the WAL to reach disk
+TEST_CONNECTION_OPTIONS = "-c synchronous_commit=off"
+if TEST_SCHEMA:
+    TEST_CONNECTION_OPTIONS += f" -c search_path={TEST_SCHEMA}"
+
 # Create engine and session for testing
 engine = create_engine(
     TEST_SQLALCHEMY_DATABASE_URL,
+    connect_args={"options": TEST_CONNECTION_OPTIONS},
     # Reduce connection pooling for testing
     pool_pre_ping=True,
     pool_recycle=3600,
@@ -32,41 +48,186 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def schema_fingerprint():
+    """
+    Hash the DDL of every mapped table, index and enum type.
+
+    Any model change alters the hash, which invalidates a schema kept from an
+    earlier test run. The CREATE TABLE statements only name Postgres enum
+    types, so their values are hashed separately.
+    """
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=engine.dialect)))
+        statements.extend(
+            str(CreateIndex(index).compile(dialect=engine.dialect))
+            for index in sorted(table.indexes, key=lambda index: index.name)
+        )
+        statements.extend(
+            f"{column.type.name}: {', '.join(column.type.enums)}"
+            for column in table.columns
+            if isinstance(column.type, Enum)
+        )
+    return hashlib.sha256("\n".join(statements).encode()).hexdigest()
+
+
+@pytest.fixture(scope="session")
+def setup_database(request):
+    """
+    Make sure the test database schema is in place for the test session.
+
+    The schema is kept after the run and its fingerprint stored in the pytest
+    cache. If the models haven't changed by the next session, only the rows
+    committed outside test transactions are truncated; otherwise every table
+    is dropped, including tables of models that no longer exist, and the
+    schema is created again. Under xdist the worker's own schema is dropped
+    instead.
+    """
+    schema = TEST_SCHEMA or "public"
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+
+    cache = getattr(request.config, "cache", None)
+    cache_key = f"ecommerce_api/schema_fingerprint_{schema}"
+    fingerprint = schema_fingerprint()
+    schema_is_current = (
+        cache is not None
+        and cache.get(cache_key, None) == fingerprint
+        and set(inspect(engine).get_table_names()) >= set(Base.metadata.tables)
+    )
+
+    if schema_is_current:
+        table_names = ", ".join(f'"{table.name}"' for table in Base.metadata.sorted_tables)
+        with engine.begin() as connection:
+            connection.execute(text(f"TRUNCATE {table_names} CASCADE"))
+    else:
+        if TEST_SCHEMA:
+            # Worker schemas only ever hold test tables, so drop them wholesale
+            with engine.begin() as connection:
+                connection.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+                connection.execute(text(f'CREATE SCHEMA "{schema}"'))
+        else:
+            # public may hold extensions, grants and other objects, so drop
+            # only the tables and enum types the test schema is built from
+            with engine.begin() as connection:
+                for table_name in inspect(connection).get_table_names():
+                    connection.execute(text(f'DROP TABLE IF EXISTS "{table_name}" CASCADE'))
+            Base.metadata.drop_all(bind=engine)
+            enum_names = {
+                column.type.name
+                for table in Base.metadata.sorted_tables
+                for column in table.columns
+                if isinstance(column.type, Enum) and column.type.name
+            }
+            with engine.begin() as connection:
+                for enum_name in sorted(enum_names):
+                    connection.execute(text(f'DROP TYPE IF EXISTS "{enum_name}" CASCADE'))
+        Base.metadata.create_all(bind=engine)
+        if cache is not None:
+            cache.set(cache_key, fingerprint)
+
+    yield
+
+
 @pytest.fixture(scope="function")
-def db():
+def db(setup_database):
     """
     Create a new database session for a test.
 
     This fixture does the following:
-    1. Create all tables in the test database
-    2. Create a new database session
+    1. Open a connection and begin an outer transaction
+    2. Bind a session to that connection in "create_savepoint" mode, so every
+       commit made by the test or the application only releases a SAVEPOINT
     3. Yield the session for the test
-    4. Rollback any changes and close the session
-    5. Drop all tables after the test
+    4. Roll back the outer transaction, discarding everything the test wrote
     """
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    connection = engine.connect()
+    transaction = connection.begin()
 
-    # Create a new session
-    db = TestingSessionLocal()
+    # Create a new session joined to the outer transaction
+    db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield db
     finally:
-        # Rollback any changes and close the session
-        db.rollback()
+        # Close the session and discard all changes made during the test
         db.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="function")
+def query_counter():
+    """
+    Record every SQL statement executed against the test database.
+
+    Returns the list the statements are appended to, so tests can assert on
+    how many queries an endpoint needs.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
 
-    # Drop all tables after the test
-    Base.metadata.drop_all(bind=engine)
+@pytest.fixture(scope="function")
+def forbid_lazy_loads(db):
+    """
+    Fail the test if a relationship is lazy-loaded from a product.
+
+    List and search endpoints return pages of products, so a lazy load from a
+    product instance runs once per row. Relationships those endpoints need
+    must be eager-loaded by the repository instead.
+    """
+    from app.models.product import Product
+
+    lazy_loads = []
+
+    def do_orm_execute(orm_execute_state):
+        if not orm_execute_state.is_relationship_load:
+            return
+        parent = orm_execute_state.lazy_loaded_from
+        if parent is not None and isinstance(parent.obj(), Product):
+            lazy_loads.append(
+                f"Product -> {orm_execute_state.bind_mapper.class_.__name__}"
+            )
+
+    event.listen(db, "do_orm_execute", do_orm_execute)
+    yield
+    event.remove(db, "do_orm_execute", do_orm_execute)
+
+    if lazy_loads:
+        pytest.fail(f"Potential n+1 query detected: {', '.join(sorted(set(lazy_loads)))}")
+
+
+@pytest.fixture(scope="session")
+def session_client():
+    """
+    Create a single test client for the whole test session.
+
+    Entering the client runs the application's startup and shutdown events,
+    so this only happens once instead of around every test. The application
+    is imported here rather than at module level, so collecting the suite
+    doesn't pull in every router.
+    """
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
 
 
 @pytest.fixture(scope="function")
-def client(db):
+def client(session_client, db):
     """
-    Create a test client with a test database.
+    Return the shared test client wired to this test's database session.
 
     This overrides the get_db dependency with our test database session.
     """
+    from app.db.session import get_db
+    from app.main import app
 
     # Override the get_db dependency with our test db
     def override_get_db():
@@ -76,73 +237,204 @@ def client(db):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    session_client.cookies.clear()
 
-    with TestClient(app) as c:
-        yield c
+    yield session_client
 
     # Remove the override after the test
-    app.dependency_overrides = {}
+    app.dependency_overrides.pop(get_db, None)
 
 
-@pytest.fixture(scope="function")
-def superuser_token_headers(client):
+@pytest.fixture(scope="session")
+def superuser_id(setup_database):
     """
-    Create a superuser and return a token for that user.
+    Create a superuser and return the user's ID.
+
+    The superuser is committed outside the per-test transaction, so it is
+    created once and shared by every test in the session.
     """
-    from app.core.security import create_access_token
     from app.db.init_db import create_superuser
     from app.models.user import User
     from app.core.config import settings
 
-    # Create a superuser in the test database
+    # Create the superuser in the test database, reusing one session for the
+    # insert and the lookup
     db_session = TestingSessionLocal()
-    create_superuser(db_session)
+    try:
+        create_superuser(db_session)
+        user = db_session.query(User).filter(User.email == settings.ADMIN_EMAIL).one()
+        user_id = str(user.id)
+    finally:
+        db_session.close()
+
+    return user_id
+
+
+@pytest.fixture(scope="session")
+def superuser_token_headers(superuser_id):
+    """
+    Return a token for the superuser, reused by every test in the session.
+    """
+    from app.core.security import create_access_token
+
+    access_token = create_access_token(superuser_id)
+
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="session")
+def normal_user_id(setup_database):
+    """
+    Create a normal user and return the user's ID.
 
-    # Create a token for the superuser
-    user = db_session.query(User).filter(User.is_superuser == True).first()
-    if not user:
-        # If no superuser found, create one directly
-        from app.core.security import get_password_hash
+    Like the superuser, the user is committed outside the per-test
+    transaction, so its password is hashed once and the user is shared by
+    every test in the session.
+    """
+    from app.core.security import get_password_hash
+    from app.models.user import User
+
+    # Create a normal user in the test database
+    db_session = TestingSessionLocal()
+    try:
         user = User(
-            email=settings.ADMIN_EMAIL,
-            password_hash=get_password_hash("admin"),
-            first_name="Admin",
+            email="test@example.com",
+            password_hash=get_password_hash("password"),
+            first_name="Test",
             last_name="User",
             is_active=True,
-            is_superuser=True,
             is_verified=True,
         )
         db_session.add(user)
         db_session.commit()
-        db_session.refresh(user)
-    
-    access_token = create_access_token(str(user.id))
-    db_session.close()
+        user_id = str(user.id)
+    finally:
+        db_session.close()
+
+    return user_id
+
+
+@pytest.fixture(scope="session")
+def normal_user_token_headers(normal_user_id):
+    """
+    Return a token for the normal user, reused by every test in the session.
+    """
+    from app.core.security import create_access_token
+
+    access_token = create_access_token(normal_user_id)
 
     return {"Authorization": f"Bearer {access_token}"}
 
 
-@pytest.fixture(scope="function")
-def normal_user_token_headers(client, db):
+def seed_shared_row(model, **values):
     """
-    Create a normal user and return a token for that user.
+    Commit a row outside the per-test transaction and return its ID.
+
+    Rows seeded this way survive every test's rollback, so they are created
+    once and shared by the whole session.
     """
-    from app.core.security import create_access_token, get_password_hash
-    from app.models.user import User
+    db_session = TestingSessionLocal()
+    try:
+        row = model(**values)
+        db_session.add(row)
+        db_session.commit()
+        return str(row.id)
+    finally:
+        db_session.close()
 
-    # Create a normal user in the test database
-    user = User(
-        email="test@example.com",
-        password_hash=get_password_hash("password"),
-        first_name="Test",
-        last_name="User",
+
+@pytest.fixture(scope="session")
+def shared_category(setup_database):
+    """
+    Create a category once per test session and return its ID, for tests that
+    only need some category.
+    """
+    from app.models.category import Category
+
+    return seed_shared_row(
+        Category,
+        name="Shared Category",
+        slug="shared-category",
+        description="Shared test category",
         is_active=True,
-        is_verified=True,
     )
-    db.add(user)
-    db.commit()
 
-    # Create a token for the user
-    access_token = create_access_token(str(user.id))
 
-    return {"Authorization": f"Bearer {access_token}"}
+@pytest.fixture(scope="session")
+def shared_brand(setup_database):
+    """
+    Create a brand once per test session and return its ID, for tests that
+    only need some brand.
+    """
+    from app.models.brand import Brand
+
+    return seed_shared_row(
+        Brand,
+        name="Shared Brand",
+        slug="shared-brand",
+        description="Shared test brand",
+        is_active=True,
+    )
+
+
+@pytest.fixture(scope="function")
+def product_factory(db, shared_category, shared_brand):
+    """
+    Return a function that creates a product row in the shared category and brand.
+
+    Keyword arguments override the product's column values. The row is
+    flushed, not committed, so it is visible to API requests in the same test.
+    """
+    from app.models.product import Product
+    from tests.utils import sequential_uuid
+
+    def create_product(**overrides):
+        product_id = sequential_uuid()
+        values = {
+            "id": product_id,
+            "name": f"Product {product_id[-4:]}",
+            "slug": f"product-{product_id[-12:]}",
+            "price": 99.99,
+            "category_id": shared_category,
+            "brand_id": shared_brand,
+            "is_active": True,
+            **overrides,
+        }
+        product = Product(**values)
+        db.add(product)
+        db.flush()
+        return product
+
+    return create_product
+
+
+@pytest.fixture(scope="function")
+def user_factory(db):
+    """
+    Return a function that creates an active, verified user row.
+
+    The password is hashed directly instead of registering the user over the
+    API, for tests that only need an existing account. Keyword arguments
+    override the user's column values. The row is flushed, not committed.
+    """
+    from app.core.security import get_password_hash
+    from app.models.user import User
+    from tests.utils import sequential_uuid
+
+    def create_user(email, password, **overrides):
+        values = {
+            "id": sequential_uuid(),
+            "email": email,
+            "password_hash": get_password_hash(password),
+            "first_name": "Test",
+            "last_name": "User",
+            "is_active": True,
+            "is_verified": True,
+            **overrides,
+        }
+        user = User(**values)
+        db.add(user)
+        db.flush()
+        return user
+
+    return create_user
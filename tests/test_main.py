@@ -1,23 +1,16 @@
-from fastapi.testclient import TestClient
-
-from app.main import app
-
-
-def test_health_check():
+def test_health_check(session_client):
     """
     Test the health check endpoint.
     """
-    client = TestClient(app)
-    response = client.get("/api/health")
+    response = session_client.get("/api/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
 
 
-def test_api_docs():
+def test_api_docs(session_client):
     """
     Test that the API docs are accessible.
     """
-    client = TestClient(app)
-    response = client.get("/api/docs")
+    response = session_client.get("/api/docs")
     assert response.status_code == 200
     assert "text/html" in response.headers["content-type"]